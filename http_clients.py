@@ -0,0 +1,21 @@
+import httpx
+
+# HTTP/2 needs the optional h2 package; without it httpx falls back to keep-alive HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# Same pool bounds for every client, so bursts of requests reuse a few open connections
+LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+def make_client(timeout: float) -> httpx.Client:
+    """Keep-alive (HTTP/2 when available) client with the shared pool limits"""
+    return httpx.Client(http2=HTTP2, timeout=timeout, limits=LIMITS)
+
+
+def make_async_client(timeout: float) -> httpx.AsyncClient:
+    """Async counterpart of make_client; create it on the loop that will use it"""
+    return httpx.AsyncClient(http2=HTTP2, timeout=timeout, limits=LIMITS)
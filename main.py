@@ -1,22 +1,47 @@
 import os 
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, messages_from_dict, message_to_dict
 from langchain.chat_models.base import init_chat_model
 from langchain.agents import create_tool_calling_agent, AgentExecutor
+from langchain.agents.format_scratchpad.tools import format_to_tool_messages
+from langchain.agents.output_parsers.tools import ToolsAgentOutputParser
+from langchain_core.runnables import RunnablePassthrough
 from langchain_core.prompts import ChatPromptTemplate
 import datetime
+import json
+import time
+import functools
+import asyncio
+import threading
+import contextvars
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import re
+import textwrap
+import random
 
 # Updated import for SQLChatMessageHistory
 from langchain_community.chat_message_histories import SQLChatMessageHistory
+from langchain_community.chat_message_histories.sql import DefaultMessageConverter
 from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain.memory import ConversationBufferWindowMemory
 import uuid
+import atexit
+import sqlite3
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from sqlalchemy import create_engine, event
+
+from http_clients import make_client, make_async_client
+from response_cache import SemanticCache, ExactCache, exact_key
+
+# Loaded before the tools are imported: they read their settings (e.g. TRIPY_WX_TTL) at import time
+load_dotenv(dotenv_path="./config/.env")
+
+from tools.weather_cache import WEATHER_CACHE_TTL
 
 # Import weather tool (make sure this doesn't cause circular imports)
 try:
-    from tools.weather_tool import create_weather_tool
+    from tools.weather_tool import create_weather_tool, create_weather_batch_tool
 except ImportError:
     print("Warning: Could not import weather_tool. Creating dummy tool.")
     def create_weather_tool():
@@ -30,35 +55,618 @@ except ImportError:
         
         return get_weather
 
-load_dotenv(dotenv_path="./config/.env")
-today = datetime.date.today().strftime("%B %d, %Y")
+    create_weather_batch_tool = None
+
+# orjson is optional; stored messages are plain JSON either way
+try:
+    import orjson
+    _json_loads = orjson.loads
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    _json_loads, _json_dumps = json.loads, json.dumps
+
+# Exact-match answers shared by the CLI and Streamlit agents, kept across restarts; they expire with
+# the weather data they may be based on
+exact_cache = ExactCache(ttl=WEATHER_CACHE_TTL)
+atexit.register(exact_cache.save)
+
+DB_PATH = "travel_chats.db"
+
+# Per-connection settings that keep hot pages and temp tables in memory
+_SQLITE_PRAGMAS = (
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Every session history shares one engine instead of creating its own per call
+_engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+
+@event.listens_for(_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # With WAL, NORMAL only syncs at checkpoints instead of on every appended message
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+# The app's own queries reuse one autocommit connection instead of reconnecting on every rerun
+_conn = None
+_conn_lock = threading.Lock()
+
+def _get_conn():
+    """Return the shared connection, opening it on first use (call with _conn_lock held)"""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        for pragma in _SQLITE_PRAGMAS:
+            _conn.execute(pragma)
+    return _conn
+
+def _touch_session(session_id: str):
+    """Record that a session just received messages"""
+    with _conn_lock:
+        _get_conn().execute(
+            "INSERT INTO sessions(session_id, last_seen) VALUES(?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET last_seen=excluded.last_seen",
+            (session_id, int(time.time() * 1000)),
+        )
+
+def _forget_session(session_id: str):
+    with _conn_lock:
+        _get_conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        _get_conn().execute("DELETE FROM session_summaries WHERE session_id = ?", (session_id,))
+
+
+# Message type -> label, looked up with type(msg) instead of comparing class names
+_ROLE_MAP = {HumanMessage: "Human", AIMessage: "Assistant", SystemMessage: "System"}
+_ORIGIN_MAP = {HumanMessage: "human", AIMessage: "assistant"}
+
+
+# Older turns are folded into a rolling summary so each request carries a bounded history
+KEEP_RECENT_MESSAGES = 10
+SUMMARIZE_AFTER_MESSAGES = 20
+_summaries_in_flight = set()
+_summaries_lock = threading.Lock()
+
+def _claim_summary(session_id: str) -> bool:
+    """Mark a session as being summarized; False if another thread already is"""
+    with _summaries_lock:
+        if session_id in _summaries_in_flight:
+            return False
+        _summaries_in_flight.add(session_id)
+        return True
+
+def _get_summary(session_id: str):
+    with _conn_lock:
+        row = _get_conn().execute(
+            "SELECT summary, up_to_id FROM session_summaries WHERE session_id = ?", (session_id,)
+        ).fetchone()
+    return row if row else ("", 0)
+
+async def _summarize_session(session_id: str, summary: str, rows):
+    """Fold the given (id, message) rows into the session's stored summary"""
+    try:
+        roles = _ROLE_MAP
+        transcript = "\n".join(
+            f"{roles[type(msg)]}: {msg.content}" for _, msg in rows if type(msg) in roles
+        )
+        prompt = (
+            "Summarize this travel-planning conversation in a few sentences. Keep destinations, "
+            "dates, budget, preferences and decisions already made.\n\n"
+            f"Earlier summary: {summary or 'none'}\n\nConversation:\n{transcript}"
+        )
+        result = await _get_llm().ainvoke(prompt)
+        with _conn_lock:
+            # The session may have been cleared while the summary was generated
+            if _get_conn().execute(
+                "SELECT 1 FROM message_store WHERE session_id = ? AND id = ?", (session_id, rows[-1][0])
+            ).fetchone() is None:
+                return
+            _get_conn().execute(
+                "INSERT INTO session_summaries(session_id, summary, up_to_id) VALUES(?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET summary=excluded.summary, up_to_id=excluded.up_to_id",
+                (session_id, result.content, rows[-1][0]),
+            )
+    except Exception as e:
+        print(f"Warning: Could not summarize session {session_id}: {e}")
+    finally:
+        with _summaries_lock:
+            _summaries_in_flight.discard(session_id)
+
+
+# Finished turns are committed on one IO thread (so writes stay in order) instead of holding up the reply
+_IO_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tripy-io")
+_pending_writes = {}
+_pending_lock = threading.Lock()
+
+def _report_write_failure(session_id: str, future):
+    # Reported as soon as the write fails, not only when someone flushes later
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Warning: Could not save conversation {session_id}: {future.exception()}")
+
+def _queue_write(session_id: str, fn, *args):
+    future = _IO_POOL.submit(fn, *args)
+    future.add_done_callback(functools.partial(_report_write_failure, session_id))
+    with _pending_lock:
+        _pending_writes[session_id] = future
+
+def flush_pending_writes(session_id: str = None):
+    """Wait for queued history writes of one session (or of all sessions)"""
+    with _pending_lock:
+        if session_id is None:
+            futures = list(_pending_writes.values())
+            _pending_writes.clear()
+        else:
+            future = _pending_writes.pop(session_id, None)
+            futures = [future] if future else []
+    for future in futures:
+        try:
+            future.result()
+        except Exception:
+            pass  # already reported by _report_write_failure
+
+atexit.register(flush_pending_writes)
+
+
+class OrjsonMessageConverter(DefaultMessageConverter):
+    """message_store converter that (de)serializes rows with orjson when it is installed"""
+
+    def from_sql_model(self, sql_message):
+        return messages_from_dict([_json_loads(sql_message.message)])[0]
+
+    def to_sql_model(self, message, session_id: str):
+        return self.model_class(session_id=session_id, message=_json_dumps(message_to_dict(message)))
+
+_message_converter = OrjsonMessageConverter("message_store")
+
+
+class TravelChatMessageHistory(SQLChatMessageHistory):
+    """SQL chat history that keeps the sessions table in sync with message_store.
+
+    `messages` returns the rolling summary (if any) followed by the turns it does not
+    cover yet; `all_messages` returns the full, untrimmed history for display.
+    """
+
+    def _load_rows(self, after_id: int = 0):
+        with _conn_lock:
+            rows = _get_conn().execute(
+                "SELECT id, message FROM message_store WHERE session_id = ? AND id > ? ORDER BY id",
+                (self.session_id, after_id),
+            ).fetchall()
+        return [(row_id, messages_from_dict([_json_loads(message)])[0]) for row_id, message in rows]
+
+    @property
+    def messages(self):
+        flush_pending_writes(self.session_id)
+        summary, up_to_id = _get_summary(self.session_id)
+        rows = self._load_rows(up_to_id)
+        if len(rows) > SUMMARIZE_AFTER_MESSAGES and _claim_summary(self.session_id):
+            # Summarize in the background; until it lands the unsummarized turns are sent as-is.
+            # Scheduled from an empty context so the task does not inherit the caller's run callbacks
+            # (its tokens would otherwise be streamed as part of the user's reply)
+            contextvars.Context().run(
+                asyncio.run_coroutine_threadsafe,
+                _summarize_session(self.session_id, summary, rows[:-KEEP_RECENT_MESSAGES]),
+                _get_loop(),
+            )
+        recent = [msg for _, msg in rows]
+        if summary:
+            return [SystemMessage(content=f"Summary so far: {summary}", additional_kwargs={"summary": True})] + recent
+        return recent
+
+    @property
+    def all_messages(self):
+        flush_pending_writes(self.session_id)
+        return super().messages
+
+    def add_message(self, message):
+        super().add_message(message)
+        _touch_session(self.session_id)
+
+    def add_messages(self, messages):
+        super().add_messages(messages)
+        _touch_session(self.session_id)
+
+    # The async agent path goes through these; the engine is synchronous, so run them in a thread
+    async def aget_messages(self):
+        return await asyncio.to_thread(lambda: self.messages)
+
+    async def aadd_messages(self, messages):
+        # Queued, not awaited: reads of this session wait for it, the reply does not
+        _queue_write(self.session_id, self.add_messages, messages)
+
+    def clear(self):
+        # A queued write landing after the delete would bring the session back
+        flush_pending_writes(self.session_id)
+        super().clear()
+        _forget_session(self.session_id)
 
 def get_session_history(session_id: str) -> SQLChatMessageHistory:
     """Get chat message history for a specific session"""
-    return SQLChatMessageHistory(session_id=session_id, connection="sqlite:///travel_chats.db")
-
+    return TravelChatMessageHistory(
+        session_id=session_id,
+        connection=_engine,
+        custom_message_converter=_message_converter,
+    )
 
-def get_travel_agent(session_id: str = None):
-    llm = init_chat_model(
+def init_db():
+    """Create the message table and its index once at startup"""
+    # Creating a history materializes message_store if it does not exist yet
+    get_session_history("")
+    with _conn_lock:
+        conn = _get_conn()
+        # Lets the per-turn history query read rows in order straight from the index
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_message_store_session_id ON message_store(session_id, id)")
+        conn.execute("PRAGMA journal_mode=WAL")
+        # One row per session so the sidebar does not have to scan every message
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions("
+            "session_id TEXT PRIMARY KEY, last_seen INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_seen ON sessions(last_seen DESC)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_summaries("
+            "session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, up_to_id INTEGER NOT NULL)"
+        )
+        # Sessions written before the table existed keep their relative order below any new activity
+        conn.execute(
+            "INSERT OR IGNORE INTO sessions(session_id, last_seen) "
+            "SELECT session_id, MAX(id) FROM message_store GROUP BY session_id"
+        )
+
+init_db()
+
+
+# A single background event loop runs the async agent calls, so tool calls issued in the
+# same turn (e.g. weather for several cities) run concurrently instead of one after another
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="tripy-async", daemon=True).start()
+    return _loop
+
+def _run_sync(coro):
+    """Run a coroutine on the background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+# Transient OpenRouter failures (429, 5xx, timeouts, dropped connections) are retried before surfacing
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+MAX_RETRIES = 3
+
+def _backoff_delay(attempt: int) -> float:
+    return 2 ** attempt + random.random()
+
+async def _with_retry(make_call, max_retries: int = MAX_RETRIES):
+    """Await make_call(), retrying transient API errors with exponential backoff and jitter"""
+    for attempt in range(max_retries):
+        try:
+            return await make_call()
+        except _RETRYABLE_ERRORS:
+            if attempt == max_retries - 1:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+
+
+def _stable_history(messages):
+    """Keep only the human/assistant turns (and the rolling summary), in the order they were stored.
+
+    The agent prompt is laid out as SYS || H1 || A1 || ... || Hn: the system prompt,
+    then completed turns exactly as recorded, then the new input. Dropping system notes
+    and tool traces keeps that prefix byte-identical from one turn to the next, which is
+    what provider-side prompt caching (OpenAI/Anthropic) matches on.
+    """
+    _HM, _AM = HumanMessage, AIMessage
+    return [
+        m for m in messages
+        if m.__class__ is _HM or m.__class__ is _AM or m.additional_kwargs.get("summary")
+    ]
+
+
+def _split_messages(messages):
+    """Split agent input into the latest user input and the chat history before it"""
+    if isinstance(messages, dict):
+        # Preferred form: already split, nothing to scan
+        return messages.get("input", ""), messages.get("chat_history") or []
+    if isinstance(messages, str):
+        return messages, []
+    if not isinstance(messages, list):
+        return (str(messages) if messages else ""), []
+    _HM = HumanMessage
+    # The latest human message is the input, everything before it is the history
+    last = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].__class__ is _HM), None)
+    if last is None:
+        return "", []
+    return messages[last].content, _stable_history(messages[:last])
+
+
+# "compare Paris and Rome", "Lisbon vs Porto for a weekend", ...
+_COMPARE_RE = re.compile(
+    r"\bcompare\s+(?P<first>[\w' .-]+?)\s+(?:and|vs\.?|versus|with)\s+(?P<second>[\w' .-]+?)(?=\s+(?:for|in|on|during|with)\b|[?.!,]|$)",
+    re.IGNORECASE,
+)
+MAX_PARALLEL_PLANS = 5
+
+def split_destinations(user_input: str):
+    """Return the destinations of a "compare X and Y" request, or an empty list"""
+    match = _COMPARE_RE.search(user_input)
+    if not match:
+        return []
+    return [match.group("first").strip(), match.group("second").strip()]
+
+async def plan_multi(destinations, request: str, chat_history=None):
+    """Plan each destination with its own agent call, running the calls concurrently"""
+    agent_executor = _build_agent_executor(get_system_prompt())
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_PLANS)
+
+    async def plan(destination):
+        async with semaphore:
+            result = await _with_retry(lambda: agent_executor.ainvoke({
+                "input": f"{request}\n\nCover only {destination} here; the other destinations are planned separately.",
+                "chat_history": chat_history or [],
+            }))
+        return result.get("output", "")
+
+    outputs = await asyncio.gather(*(plan(d) for d in destinations))
+    return "\n\n".join(f"## {d}\n\n{output}" for d, output in zip(destinations, outputs))
+
+
+# Anything that may need the weather tool or a multi-step answer goes to the full agent
+_TOOL_HINTS_RE = re.compile(
+    r"\b(weather|forecast|temperature|rain|snow|trip|itinerar\w*|plan\w*|visit\w*|travel\w*|go(?:ing)? to|"
+    r"pack\w*|days?|weeks?|weekend|month|holiday|vacation|flight|hotel|budget|destination|city|country)\b|\d",
+    re.IGNORECASE,
+)
+FAST_PATH_MAX_WORDS = 12
+# Small talk that never continues the planning, whatever was asked before
+_SMALL_TALK_RE = re.compile(
+    r"^\W*(hi|hello|hey|thanks|thank you|thx|cheers|bye|goodbye|good (?:morning|afternoon|evening|night))"
+    r"(?:\s+(?:tripy|there|again|so much|a lot|very much))?\W*$",
+    re.IGNORECASE,
+)
+
+def needs_tools(user_input: str, last_reply: str = None) -> bool:
+    """Whether a turn should go to the tool-calling agent rather than the single-step one"""
+    if len(user_input.split()) > FAST_PATH_MAX_WORDS or _TOOL_HINTS_RE.search(user_input):
+        return True
+    if _SMALL_TALK_RE.match(user_input):
+        return False
+    # A short answer to a clarifying question ("Lisbon", "yes go ahead") continues the planning,
+    # which needs the weather tool; so does a first message that is not small talk
+    return last_reply is None or "?" in last_reply
+
+def last_reply(messages):
+    """Content of the most recent assistant message, or None"""
+    for message in reversed(messages or []):
+        if isinstance(message, AIMessage):
+            return str(message.content)
+    return None
+
+def _last_stored_reply(session_id: str):
+    """Most recent stored assistant message of a session, read straight from the index"""
+    flush_pending_writes(session_id)
+    with _conn_lock:
+        row = _get_conn().execute(
+            "SELECT message FROM message_store WHERE session_id = ? ORDER BY id DESC LIMIT 1", (session_id,)
+        ).fetchone()
+    return last_reply(messages_from_dict([_json_loads(row[0])])) if row else None
+
+
+# For Streamlit compatibility, a simple wrapper around the agent for use in streamlit
+class StreamableAgent:
+    def __init__(self, agent_executor, llm, session_id=None, fast_executor=None):
+        self.agent_executor = agent_executor
+        self.fast_executor = fast_executor
+        self.llm = llm
+        self.session_id = session_id  # Fixed typo: was session_iud
+
+        if session_id:
+            # If session_id provided, wrap with message history
+            self.agent_with_history = self._with_history(self.agent_executor)
+            self.fast_with_history = self._with_history(self.fast_executor) if fast_executor else None
+        else:
+            self.agent_with_history = None
+            self.fast_with_history = None
+
+    @staticmethod
+    def _with_history(executor):
+        return RunnableWithMessageHistory(
+            executor,
+            get_session_history,
+            input_messages_key="input",
+            history_messages_key="chat_history",
+            output_messages_key="output",
+        )
+
+    def _route(self, user_input: str, last_reply: str = None):
+        """Pick (executor, history-wrapped executor) for this turn"""
+        if self.fast_executor is not None and not needs_tools(user_input, last_reply):
+            return self.fast_executor, self.fast_with_history
+        return self.agent_executor, self.agent_with_history
+
+    async def ainvoke(self, messages):
+        user_input, chat_history = _split_messages(messages)
+        if not user_input:
+            return {"output": "No valid input provided."}
+
+        destinations = split_destinations(user_input)
+
+        if self.session_id and self.agent_with_history:
+            history = get_session_history(self.session_id)
+            past = await history.aget_messages()
+            key = exact_key(get_system_prompt(), user_input, past)
+            cached = exact_cache.get(key)
+            if cached is not None:
+                # Repeated input in the same context: record the turn without calling the LLM
+                await history.aadd_messages([HumanMessage(content=user_input), AIMessage(content=cached)])
+                return {"input": user_input, "output": cached}
+
+            if destinations:
+                output = await plan_multi(destinations, user_input, _stable_history(past))
+                await history.aadd_messages([HumanMessage(content=user_input), AIMessage(content=output)])
+                response = {"input": user_input, "output": output}
+            else:
+                _, with_history = self._route(user_input, last_reply(past))
+                response = await _with_retry(lambda: with_history.ainvoke(
+                    {"input": user_input},
+                    config={"configurable": {"session_id": self.session_id}},
+                ))
+        else:
+            # If no session_id is provided, the caller passes its buffered history along with the input
+            key = exact_key(get_system_prompt(), user_input, chat_history)
+            cached = exact_cache.get(key)
+            if cached is not None:
+                return {"input": user_input, "chat_history": chat_history, "output": cached}
+
+            if destinations:
+                output = await plan_multi(destinations, user_input, chat_history)
+                response = {"input": user_input, "chat_history": chat_history, "output": output}
+            else:
+                executor, _ = self._route(user_input, last_reply(chat_history))
+                response = await _with_retry(lambda: executor.ainvoke({
+                    "input": user_input,
+                    "chat_history": chat_history
+                }))
+        exact_cache.put(key, response.get("output", ""))
+        return response
+
+    def invoke(self, messages):
+        # Blocking callers (CLI, Streamlit script) wait on the shared background loop
+        return _run_sync(self.ainvoke(messages))
+
+    async def astream(self, messages):
+        # Stream tokens from the agent itself, so tool calls still happen while streaming
+        user_input, chat_history = _split_messages(messages)
+        if not user_input:
+            return
+        if self.session_id and self.fast_executor is not None:
+            previous = await asyncio.to_thread(_last_stored_reply, self.session_id)
+        else:
+            previous = last_reply(chat_history)
+        executor, with_history = self._route(user_input, previous)
+        if with_history is not None:
+            # Session-bound: the wrapper loads the stored history and saves the turn when the run ends
+            def events():
+                return with_history.astream_events(
+                    {"input": user_input},
+                    config={"configurable": {"session_id": self.session_id}},
+                    version="v2",
+                )
+        else:
+            def events():
+                return executor.astream_events(
+                    {"input": user_input, "chat_history": chat_history},
+                    version="v2",
+                )
+        for attempt in range(MAX_RETRIES):
+            started = False
+            try:
+                async for ev in events():
+                    if ev["event"] == "on_chat_model_stream":
+                        chunk = ev["data"]["chunk"]
+                        if chunk.content:
+                            started = True
+                            yield chunk
+                return
+            except _RETRYABLE_ERRORS:
+                # Once tokens have been shown a retry would repeat them, so only retry before that
+                if started or attempt == MAX_RETRIES - 1:
+                    raise
+                await asyncio.sleep(_backoff_delay(attempt))
+
+    def stream(self, messages):
+        # Synchronous view of astream: a producer on the background loop keeps reading from the
+        # network into a queue while the caller renders chunks at its own pace
+        chunks = queue.Queue()
+        done = object()
+
+        async def produce():
+            try:
+                async for chunk in self.astream(messages):
+                    chunks.put(chunk)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), _get_loop())
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Stop reading from the network if the caller abandons the stream
+            future.cancel()
+
+
+# Persistent clients so each turn reuses an open TLS connection to OpenRouter
+_shared_httpx = make_client(timeout=60.0)
+_shared_httpx_async = make_async_client(timeout=60.0)
+
+def _close_http_clients():
+    _shared_httpx.close()
+    # The async client's connections belong to the background loop, so close it there
+    if _loop is not None and _loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_shared_httpx_async.aclose(), _loop).result(timeout=5)
+        except Exception:
+            pass
+
+atexit.register(_close_http_clients)
+
+# The chat model and tools are stateless, so every session shares one instance (and one HTTP pool)
+@functools.lru_cache(maxsize=1)
+def _get_llm():
+    return init_chat_model(
         model="openai:gpt-4o-mini",
         base_url="https://openrouter.ai/api/v1",
         api_key=os.getenv("API_KEY"),
         temperature=0.7,
         max_tokens=2000,
         frequency_penalty=0.5,
+        http_client=_shared_httpx,
+        http_async_client=_shared_httpx_async,
     )
 
+
+@functools.lru_cache(maxsize=1)
+def _get_tools():
     # Weather tool creation
     tools = [create_weather_tool()]
+    if create_weather_batch_tool is not None:
+        tools.append(create_weather_batch_tool())
+    return tools
+
 
+def _build_prompt(system_prompt: str):
     # Defining a chat prompt template for the agent for how the LLM should behave 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", get_system_prompt()),
+    return ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
         ("placeholder", "{chat_history}"),
         ("human", "{input}"),
         ("placeholder", "{agent_scratchpad}"),
     ])
 
+
+# The executor holds no per-user state, so all sessions share one per system prompt
+@functools.lru_cache(maxsize=2)
+def _build_agent_executor(system_prompt: str):
+    llm = _get_llm()
+    tools = _get_tools()
+    prompt = _build_prompt(system_prompt)
+
     # Constructing a tool-using agent that can dynamically call the weather tool based on input
     agent = create_tool_calling_agent(llm, tools, prompt)
     
@@ -69,157 +677,44 @@ def get_travel_agent(session_id: str = None):
         verbose=False,
         handle_parsing_errors=True,
         max_iterations=5,
+        return_intermediate_steps=False,
     )
+    return agent_executor
 
-    # For Streamlit compatibility, a simple wrapper around the agent for use in streamlit
-    class StreamableAgent:
-        def __init__(self, agent_executor, llm, session_id=None):
-            self.agent_executor = agent_executor
-            self.llm = llm
-            self.session_id = session_id  # Fixed typo: was session_iud
-
-            if session_id:
-                # If session_id provided, wrap with message history
-                self.agent_with_history = RunnableWithMessageHistory(
-                    self.agent_executor,
-                    get_session_history,
-                    input_message_key="input",
-                    history_message_key="chat_history",
-                )
-            else:
-                self.agent_with_history = None
-
-        # def invoke(self, messages):
-        #     if hasattr(self, 'session_id') and self.session_id and self.agent_with_history:
-        #         # Handling both message format and direct input
-        #         # Extracting the last user message
-        #         user_input = ""
-        #         if isinstance(messages, list) and len(messages) > 0:
-        #             for msg in messages:
-        #                 if hasattr(msg, 'content') and msg.__class__.__name__ == 'HumanMessage':
-        #                     user_input = msg.content
-        #                     break
-        #         elif isinstance(messages, str):
-        #             user_input = messages
-        #         else:
-        #             user_input = str(messages)
-                
-        #         if user_input:
-        #             return self.agent_with_history.invoke(
-        #                 {"input": user_input},
-        #                 config={"configurable": {"session_id": self.session_id}},
-        #             )
-        #         else:
-        #             return {"output": "No valid input provided."}
-        #     else:
-        #         # If no session_id is provided, using original existing buffer memory
-        #         if isinstance(messages, list) and len(messages) > 0:
-        #             user_input = ""
-        #             chat_history = []
-        #             for msg in messages:
-        #                 if hasattr(msg, 'content'):
-        #                     if msg.__class__.__name__ == 'HumanMessage':
-        #                         user_input = msg.content
-        #                     elif msg.__class__.__name__ == 'SystemMessage':
-        #                         continue
-        #                     else:
-        #                         chat_history.append(msg)
-                    
-        #             if user_input:
-        #                 return self.agent_executor.invoke({
-        #                     "input": user_input,
-        #                     "chat_history": chat_history
-        #                 })
-        #             else:
-        #                 return {"output": "No valid input provided."}
-        #         else:
-        #             # Handle string input or other formats
-        #             input_str = str(messages) if messages else ""
-        #             if input_str:
-        #                 return self.agent_executor.invoke({"input": input_str})
-        #             else:
-        #                 return {"output": "No valid input provided."}
-        def invoke(self, messages):
-            if self.session_id and self.agent_with_history:
-                # Handling both message format and direct input
-                # Extracting the last user message
-                user_input = ""
-                if isinstance(messages, list) and len(messages) > 0:
-                    for msg in messages:
-                        if hasattr(msg, 'content') and msg.__class__.__name__ == 'HumanMessage':
-                            user_input = msg.content
-                            break
-                elif isinstance(messages, str):
-                    user_input = messages
-                else:
-                    user_input = str(messages)
-                
-                if user_input:
-                    return self.agent_with_history.invoke(
-                        {"input": user_input},
-                        config={"configurable": {"session_id": self.session_id}},
-                    )
-                else:
-                    return {"output": "No valid input provided."}
-            else:
-                # If no session_id is provided, using original existing buffer memory
-                if isinstance(messages, list) and len(messages) > 0:
-                    user_input = ""
-                    chat_history = []
-                    for msg in messages:
-                        if hasattr(msg, 'content'):
-                            if msg.__class__.__name__ == 'HumanMessage':
-                                user_input = msg.content
-                            elif msg.__class__.__name__ == 'SystemMessage':
-                                continue
-                            else:
-                                chat_history.append(msg)
-                    
-                    if user_input:
-                        return self.agent_executor.invoke({
-                            "input": user_input,
-                            "chat_history": chat_history
-                        })
-                    else:
-                        return {"output": "No valid input provided."}
-                else:
-                    # Handle string input or other formats
-                    input_str = str(messages) if messages else ""
-                    if input_str:
-                        return self.agent_executor.invoke({"input": input_str})
-                    else:
-                        return {"output": "No valid input provided."}
-                    
-        def stream(self, messages):
-            # For streaming, use the LLM directly with a simplified approach
-            if isinstance(messages, list):
-                # Convert messages to a single prompt
-                prompt_parts = []
-                for msg in messages:
-                    if hasattr(msg, 'content'):
-                        if msg.__class__.__name__ == 'SystemMessage':
-                            prompt_parts.append(f"System: {msg.content}")
-                        elif msg.__class__.__name__ == 'HumanMessage':
-                            prompt_parts.append(f"Human: {msg.content}")
-                        elif msg.__class__.__name__ == 'AIMessage':
-                            prompt_parts.append(f"Assistant: {msg.content}")
-                
-                full_prompt = "\n\n".join(prompt_parts)
-                full_prompt += "\n\nAssistant: "
-                
-                # Stream the response
-                for chunk in self.llm.stream(full_prompt):
-                    if hasattr(chunk, 'content') and chunk.content:
-                        yield chunk
-            else:
-                # Fallback for non-list input
-                for chunk in self.llm.stream(str(messages)):
-                    if hasattr(chunk, 'content') and chunk.content:
-                        yield chunk
+
+# Same prompt and model without tools bound: one LLM call that answers directly, for small talk
+@functools.lru_cache(maxsize=2)
+def _build_fast_executor(system_prompt: str):
+    agent = (
+        RunnablePassthrough.assign(agent_scratchpad=lambda x: format_to_tool_messages(x["intermediate_steps"]))
+        | _build_prompt(system_prompt)
+        | _get_llm()
+        | ToolsAgentOutputParser()
+    )
+    return AgentExecutor(
+        agent=agent,
+        tools=[],
+        verbose=False,
+        handle_parsing_errors=True,
+        max_iterations=1,
+        return_intermediate_steps=False,
+    )
+
+
+def get_travel_agent(session_id: str = None):
+    # Bring up the background loop now so the first streamed reply does not wait for it
+    _get_loop()
+    system_prompt = get_system_prompt()
+    agent_executor = _build_agent_executor(system_prompt)
 
     # Updated to pass session_id to StreamableAgent
-    streamable_agent = StreamableAgent(agent_executor, llm, session_id)
-    return streamable_agent, None  # Return None for memory since we're using SQLChatMessageHistory
+    streamable_agent = StreamableAgent(
+        agent_executor, _get_llm(), session_id, fast_executor=_build_fast_executor(system_prompt)
+    )
+    if session_id:
+        return streamable_agent, None  # Return None for memory since we're using SQLChatMessageHistory
+    # Without a session, the caller keeps the last few exchanges in an in-process window memory
+    return streamable_agent, ConversationBufferWindowMemory(k=3, return_messages=True)
 
 
 # Creating a new chat session
@@ -227,26 +722,39 @@ def create_new_chat_session():
     """Create a new chat session ID"""
     return str(uuid.uuid4())
 
-def get_all_chat_sessions():
-    """Get all existing chat sessions IDs"""
-    import sqlite3
+def get_all_chat_sessions(limit: int = 100):
+    """Get existing chat sessions IDs, most recently active first"""
     try:
-        conn = sqlite3.connect("travel_chats.db")
-        cursor = conn.cursor()
-
-        cursor.execute("""SELECT name FROM sqlite_master WHERE type='table' AND name='message_store'""")
-
-        if not cursor.fetchone():
-            conn.close()
-            return []
+        with _conn_lock:
+            rows = _get_conn().execute(
+                "SELECT session_id FROM sessions ORDER BY last_seen DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+    except Exception as e:
+        return []
 
-        cursor.execute("SELECT DISTINCT session_id FROM message_store ORDER BY rowid DESC")
-        sessions = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return sessions
+def get_sessions_with_preview(limit: int = 20):
+    """Get (session_id, last message JSON) pairs, most recently active first, in one query"""
+    flush_pending_writes()
+    try:
+        with _conn_lock:
+            return _get_conn().execute(
+                "SELECT s.session_id, m.message FROM sessions s "
+                "JOIN message_store m ON m.id = "
+                "(SELECT MAX(id) FROM message_store WHERE session_id = s.session_id) "
+                "ORDER BY s.last_seen DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
     except Exception as e:
+        print(f"Error loading session previews: {e}")
         return []
 
+def get_sessions_marker():
+    """(session count, latest activity) from the sessions table; changes whenever the sidebar list would"""
+    flush_pending_writes()
+    with _conn_lock:
+        return tuple(_get_conn().execute("SELECT COUNT(*), MAX(last_seen) FROM sessions").fetchone())
+
 def delete_chat_session(session_id: str):
     """Delete a specific chat session by ID"""
     try:
@@ -257,26 +765,58 @@ def delete_chat_session(session_id: str):
         print(f"Error deleting session {session_id}: {e}")
         return False
 
-def get_chat_history_for_session(session_id: str):
-    """Get chat history for a specific session"""
+def get_history_marker(session_id: str) -> int:
+    """Id of the session's newest stored message (0 if none); changes whenever the history does"""
+    flush_pending_writes(session_id)
+    with _conn_lock:
+        row = _get_conn().execute(
+            "SELECT MAX(id) FROM message_store WHERE session_id = ?", (session_id,)
+        ).fetchone()
+    return row[0] or 0
+
+def get_chat_history_for_session(session_id: str, limit: int = None, before_id: int = None):
+    """Get chat history for a specific session, optionally only the newest `limit` messages stored
+    before message `before_id`; paged results carry each message's stored "id" """
     try:
-        history = get_session_history(session_id)
-        messages = []
-        for message in history.messages:
-            if hasattr(message, 'content'):
-                msg_type = "human" if message.__class__.__name__ == 'HumanMessage' else "assistant"
-                messages.append({
-                    "origin": msg_type,  # Changed from "type" to "origin" to match streamlit_app.py
-                    "content": message.content
-                })
-        return messages
+        if limit is None:
+            rows = [(None, message) for message in get_session_history(session_id).all_messages]
+        else:
+            flush_pending_writes(session_id)
+            with _conn_lock:
+                stored = _get_conn().execute(
+                    "SELECT id, message FROM message_store WHERE session_id = ? AND id < ? "
+                    "ORDER BY id DESC LIMIT ?",
+                    (session_id, before_id if before_id is not None else 2**63 - 1, limit),
+                ).fetchall()
+            rows = [(row_id, messages_from_dict([_json_loads(message)])[0]) for row_id, message in reversed(stored)]
+        origins = _ORIGIN_MAP
+        # "origin" (not "type") matches streamlit_app.py
+        return [
+            {"origin": origins[type(message)], "content": message.content, "id": row_id}
+            for row_id, message in rows
+            if type(message) in origins
+        ]
     except Exception as e:
         print(f"Error retrieving history for session {session_id}: {e}")
         return []
 
 
-def get_system_prompt():
-    return f"""
+@functools.lru_cache(maxsize=1)
+def _today_cached(bucket: int) -> str:
+    return datetime.date.today().strftime("%B %d, %Y")
+
+def today_str() -> str:
+    """Today's date as it appears in the system prompt, recomputed at most once an hour"""
+    return _today_cached(int(time.time()) // 3600)
+
+
+def get_system_prompt() -> str:
+    """Return today's system prompt; it is rendered once per date and cached"""
+    return _render_system_prompt(today_str())
+
+
+# Dedented once at import so no indentation whitespace is sent with every request
+_SYSTEM_TEMPLATE = textwrap.dedent("""
         You are a travel agent specializing in creating personalized trip itineraries.
 
         Your expertise includes:
@@ -294,295 +834,69 @@ def get_system_prompt():
 
         When helping a user plan trips:
         1. Ask clarifying questions about destination, budget, dates, and preferences.
-        2. Use the get_weather tool to check the weather for the destination and dates.
+        2. Use the get_weather tool to check the weather for the destination and dates (get_weather_batch when the trip has several cities).
         3. After retrieving the weather, proceed to provide a structured, day-by-day itinerary, including practical tips, local insights, estimated costs, and time for activities.
         4. Be enthusiastic and helpful.
 
         Always format your itineraries clearly with days, items, activities, and brief descriptions.
         Do not stop after providing the weather—ALWAYS continue and provide the full itinerary unless the user says to stop.
-    """
-
-
-# import os 
-# from dotenv import load_dotenv
-# from langchain_openai import ChatOpenAI
-# from langchain_core.messages import HumanMessage, SystemMessage
-# from langchain_core.prompts import PromptTemplate
-# from langchain.chains import LLMChain
-# from langchain.memory import ConversationBufferMemory
-# from langchain.chat_models.base import init_chat_model
-# from langchain.agents import create_tool_calling_agent, AgentExecutor
-# from langchain_core.prompts import ChatPromptTemplate
-# from tools.weather_tool import create_weather_tool
-# import datetime
-
-# from langchain_community.chat_message_histories import SQLChatMessageHistory
-# from langchain_core.runnables.history import RunnableWithMessageHistory
-# import uuid
-
-# load_dotenv(dotenv_path="./config/.env")
-# today = datetime.date.today().strftime("%B %d, %Y")
-
-# def get_session_history(session_id: str) -> SQLChatMessageHistory:
-#     """Get chat message history for a specific session"""
-#     return SQLChatMessageHistory(session_id=session_id, connection="sqlite:///travel_chats.db")
-
-
-# def get_travel_agent(session_id: str = None):
-#     llm = init_chat_model(
-#         model="openai:gpt-4o-mini",
-#         base_url="https://openrouter.ai/api/v1",
-#         api_key=os.getenv("API_KEY"),
-#         temperature=0.7,
-#         max_tokens=2000,
-#         frequency_penalty=0.5,
-#     )
-
-#     if session_id:
-#         # Using SQLite-backend memory for presistance
-#         memory = SQLChatMessageHistory(session_id=session_id, connection="sqlite:///travel_chats.db")
-#     else:
-#         # Useing original buffer memory for backwards compatibility
-#         memory = ConversationBufferMemory(k = 10, return_messages=True)
-
-#     #Weather tool creation
-#     tools = [create_weather_tool()]
-
-#     # Defining a chat prompt template for the agent for how the LLM should behave 
-#     prompt = ChatPromptTemplate.from_messages([
-#         ("system", get_system_prompt()),
-#         ("placeholder", "{chat_history}"),
-#         ("human", "{input}"),
-#         ("placeholder", "{agent_scratchpad}"),
-#     ])
-
-#     # Constructing a tool-using agent that can dynamically call the weather tool based on input
-#     agent = create_tool_calling_agent(llm, tools, prompt)
-    
-#     # Setting up the agent executor with the defined agent and tools, handling parsing errors, and limiting iterations
-#     agent_executor = AgentExecutor(
-#         agent=agent,
-#         tools=tools,
-#         verbose=False,
-#         handle_parsing_errors=True,
-#         max_iterations=5,
-#     )
-
-#     # For Streamlit compatibility, a simple wrapper arount the agent for use in streamlit
-#     class StreamableAgent:
-#         def __init__(self, agent_executor, llm, session_id=None):
-#             self.agent_executor = agent_executor
-#             self.llm = llm
-#             self.session_iud = session_id
-
-#             if session_id:
-#                 #if session_id provided, wrap with message history
-#                 self.agent_with_history = RunnableWithMessageHistory(
-#                     self.agent_executor,
-#                     get_session_history,
-#                     input_message_key="input",
-#                     history_message_key="chat_history",
-#                 )
-#             else:
-#                 self.agent_with_history = None
-
-#         # This takes a list of LangChain messages (like SystemMessage, HumanMessage, AIMessage).
-#         # Extracts the latest human message as input.
-#         # Collects the rest of the messages as chat history (excluding system ones).
-#         # Calls the LangChain agent executor
-#         def invoke(self, messages):
-#             if self.session_id and self.agent_with_history:
-#             # Handling both message format and direct input
-#                 # Extracting the last user message
-#                 user_input = ""
-#                 if isinstance(messages, list):
-#                     # chat_history = []
-#                     for msg in messages:
-#                         if hasattr(msg, 'content') and msg.__class__.__name__ == 'HumanMessage':
-#                             user_input = msg.content
-#                             break
-#                 else:
-#                     user_input = str(messages)
-                
-#                 return self.agent_executor.invoke({
-#                         "input": user_input},
-#                         config={"configurable": {"session_id": self.session_id}},
-#                     )
-#             else:
-#                 # If no sessuion_id is provided, using original existing buffer memory
-#                 if isinstance(messages, list):
-#                     user_input = ""
-#                     chat_history = []
-#                     for msg in messages:
-#                         if hasattr(msg, 'content'):
-#                             if msg.__class__.__name__ == 'HumanMessage':
-#                                 user_input = msg.content
-#                             elif msg.__class__.__name__ == 'SystemMessage':
-#                                 continue
-#                             else:
-#                                 chat_history.append(msg)
-                    
-#                     return self.agent_executor.invoke({
-#                         "input": user_input,
-#                         "chat_history": chat_history
-#                     })
-#                 else:
-#                     return self.agent_executor.invoke(messages)
-        
-#         def stream(self, messages):
-#             # For streaming, i use the LLM directly with a simplified approach
-#             if isinstance(messages, list):
-#                 # Convert messages to a single prompt
-#                 prompt_parts = []
-#                 for msg in messages:
-#                     if hasattr(msg, 'content'):
-#                         if msg.__class__.__name__ == 'SystemMessage':
-#                             prompt_parts.append(f"System: {msg.content}")
-#                         elif msg.__class__.__name__ == 'HumanMessage':
-#                             prompt_parts.append(f"Human: {msg.content}")
-#                         elif msg.__class__.__name__ == 'AIMessage':
-#                             prompt_parts.append(f"Assistant: {msg.content}")
-                
-#                 full_prompt = "\n\n".join(prompt_parts)
-#                 full_prompt += "\n\nAssistant: "
-                
-#                 # Stream the response
-#                 for chunk in self.llm.stream(full_prompt):
-#                     if hasattr(chunk, 'content') and chunk.content:
-#                         yield chunk
-#             else:
-#                 # Fallback for non-list input
-#                 for chunk in self.llm.stream(str(messages)):
-#                     if hasattr(chunk, 'content') and chunk.content:
-#                         yield chunk
-
-#     streamable_agent = StreamableAgent(agent_executor, llm)
-#     return streamable_agent, memory
-
-# #Creating a new chat session
-# def create_new_chat_session():
-#     """Create a new chat session ID"""
-#     return str(uuid.uuid4())
-
-# def get_all_chat_sessions():
-#     """Get all existing chat sessions IDs"""
-#     import sqlite3
-#     try:
-#         conn = sqlite3.connect("travel_chats.db")
-#         cursor = conn.cursor()
-
-#         cursor.execute("""SELECT name FROM sqlite_master WHERE type='table' AND name='message_store'""")
-
-#         if not cursor.fetchone():
-#             conn.close()
-#             return []
-
-#         cursor.execute("SELECT DISTINCT session_id FROM message_store ORDER BY rowid DESC")
-#         sessions = [row[0] for row in cursor.fetchall()]
-#         conn.close()
-#         return sessions
-#     except Exception as e:
-#         return []
-
-# def delete_chat_session(session_id: str):
-#     """Delete a specific chat session by ID"""
-#     try:
-#         history = get_session_history(session_id)
-#         history.clear()
-#         return True
-#     except Exception as e:
-#         print(f"Error deleting session {session_id}: {e}")
-#         return False
-
-# def get_chat_history_for_session(session_id: str):
-#     """Get chat history for a specific session"""
-#     try:
-#         history = get_session_history(session_id)
-#         messages = []
-#         for message in history.messages:
-#             if hasattr(message, 'content'):
-#                 msg_type = "human" if message.__class__.__name__ == 'HumanMessage' else "assistant"
-#                 messages.append({
-#                     "type": msg_type,
-#                     "content": message.content
-#                 })
-#         return messages
-#     except Exception as e:
-#         print(f"Error retrieving history for session {session_id}: {e}")
-#         return []
-
-
-# # This function defines the core personality and logic of the travel agent.
-# # It instructs the agent to: 
-# def get_system_prompt():
-#     return f"""
-#         You are a travel agent specializing in creating personalized trip itineraries.
-
-#         Your expertise includes:
-#         - Creating detailed day-by-day itineraries
-#         - Budget planning and cost estimation
-#         - Recommending activities, restaurants, and accommodations
-#         - Adapting to different travel styles (e.g., adventure, relaxation, cultural immersion, etc.)
-#         - Using current weather and forecasts to suggest appropriate activities
-#         - Considering travel logistics and timing
-#         - While choosing the restaurants ask user about their preferences (e.g., vegetarian, vegan, local cuisine, etc.)
-
-#         IMPORTANT: When planning trips, always check the weather for the destination to provide weather-appropriate recommendations. 
-#         Use the most accurate weather informations to give exact advice when users mention a destination and if there is no exact date provided calculate a date from the current day.
-#         f"And remember todays date is {today}".
-
-#         When helping a user plan trips:
-#         1. Ask clarifying questions about destination, budget, dates, and preferences.
-#         2. Use the get_weather tool to check the weather for the destination and dates.
-#         3. After retrieving the weather, proceed to provide a structured, day-by-day itinerary, including practical tips, local insights, estimated costs, and time for activities.
-#         4. Be enthusiastic and helpful.
-
-#         Always format your itineraries clearly with days, items, activities, and brief descriptions.
-#         Do not stop after providing the weather—ALWAYS continue and provide the full itinerary unless the user says to stop.
-#     """
-
-
-# # def main():
-# #     print("Welcome to the Smart Trip Planner!")
-# #     print("=" * 40)
-# #     print("Hi! I'm Tripy, your personal travel planning assistant.")
-# #     print("Tell me where you'd like to go and I'll help you plan the perfect trip!")
-# #     print("Type 'quit' to exit at any time.\n")
-
-# #     streamable_agent, memory = get_travel_agent()
-    
-# #     while True:
-# #         user_input = input(">>> : ").strip()
-
-# #         if user_input.lower() == "quit":
-# #             print("Goodbye!")
-# #             break
-# #         if not user_input:
-# #             continue
-    
-# #         try:
-# #             # Get conversation history
-# #             history = memory.chat_memory.messages
-            
-# #             # Invoke the agent executor with the input and chat history
-# #             response = streamable_agent.agent_executor.invoke({
-# #                 "input": user_input,
-# #                 "chat_history": history
-# #             })
-
-# #             # Extract the output from the response
-# #             output = response.get("output", "")
-# #             print(f"Tripy: {output}\n")
-
-# #             # Save the conversation to memory
-# #             memory.save_context(
-# #                 {"input": user_input},
-# #                 {"output": output}
-# #             )
-# #         except Exception as e:
-# #             print(f"Sorry, I encountered an error: {e}")
-# #             print("Please try again!\n")
-
-
-# # if __name__ == "__main__":
-# #     main()
+""").strip()
+
+
+# The rendered prompt is reused for the whole day, so every session sends the identical prefix
+@functools.lru_cache(maxsize=2)
+def _render_system_prompt(today: str) -> str:
+    return _SYSTEM_TEMPLATE.format(today=today)
+
+
+def main():
+    print("Welcome to the Smart Trip Planner!")
+    print("=" * 40)
+    print("Hi! I'm Tripy, your personal travel planning assistant.")
+    print("Tell me where you'd like to go and I'll help you plan the perfect trip!")
+    print("Type 'quit' to exit at any time.\n")
+
+    agent, memory = get_travel_agent()
+    system_prompt = get_system_prompt()
+    # Paraphrased questions in the same context are answered from the cache instead of the LLM
+    cache = SemanticCache(system_prompt)
+
+    while True:
+        user_input = input(">>> : ").strip()
+
+        if not user_input:
+            continue
+        if user_input.lower() == "quit":
+            print("Goodbye!")
+            break
+
+        try:
+            # The prompt carries today's date: when it changes, so do the agent and the cache it matches against
+            if get_system_prompt() != system_prompt:
+                system_prompt = get_system_prompt()
+                agent, _ = get_travel_agent()
+                cache = SemanticCache(system_prompt)
+
+            # Only the last k exchanges, so the prompt does not grow with the conversation
+            history = memory.buffer_as_messages
+
+            # Paraphrases are answered by the semantic cache; exact repeats by the agent's own exact cache
+            output, embedding = cache.lookup(user_input, history, threshold=0.92)
+            if output is None:
+                # The agent's prompt template adds the system prompt itself
+                response = agent.invoke({"input": user_input, "chat_history": history})
+                output = response.get("output", "")
+                cache.insert(user_input, output, history, embedding)
+
+            print(f"Tripy: {output}\n")
+
+            # Save the conversation to memory (plain appends, no input/output key inference)
+            memory.chat_memory.add_user_message(user_input)
+            memory.chat_memory.add_ai_message(output)
+        except Exception as e:
+            print(f"Sorry, I encountered an error: {e}")
+            print("Please try again!\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+import importlib.util
+from collections import OrderedDict
+
+import numpy as np
+
+# Local sentence embeddings are optional; without them the semantic cache simply never hits.
+# Only availability is checked here: the package pulls in torch, so it is imported on first embed.
+HAS_EMBEDDINGS = importlib.util.find_spec("langchain_huggingface") is not None
+
+CACHE_DIR = "./cache"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def exact_key(system_prompt: str, user_input: str, history=None) -> str:
+    """Build the exact-match cache key from the prompt, the input and history_hash of the conversation"""
+    return hashlib.blake2b(
+        system_prompt.encode() + b"|" + user_input.encode() + b"|" + history_hash(history).encode()
+    ).hexdigest()
+
+
+def is_answer(output: str) -> bool:
+    """Whether an agent output is worth replaying (not empty, not an executor stop message)"""
+    return bool(output and output.strip()) and not output.startswith("Agent stopped due to")
+
+
+def prompt_hash(text: str) -> str:
+    """Hash a system prompt so that prompt edits invalidate cached answers"""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def history_hash(messages, last_n: int = 4) -> str:
+    """Hash the rolling summary and the most recent messages (with their roles) so answers are
+    only reused in the same conversational context"""
+    messages = messages or []
+    summary = "|".join(
+        str(m.content) for m in messages if getattr(m, "additional_kwargs", {}).get("summary")
+    )
+    recent = "|".join(f"{m.type}:{m.content}" for m in messages[-last_n:])
+    return hashlib.md5(f"{summary}||{recent}".encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """Prompt-response cache matching paraphrased inputs by embedding similarity"""
+
+    def __init__(self, system_prompt: str, db_path: str = os.path.join(CACHE_DIR, "semantic.db")):
+        self.sys_hash = prompt_hash(system_prompt)
+        self._lock = threading.Lock()
+        self._embedder = None
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                embedding BLOB NOT NULL,
+                input TEXT NOT NULL,
+                output TEXT NOT NULL,
+                sys_hash TEXT NOT NULL,
+                history_hash TEXT NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+        # In-memory cosine index over the rows written for the current system prompt
+        rows = self._conn.execute(
+            "SELECT embedding, history_hash, output FROM cache WHERE sys_hash = ?",
+            (self.sys_hash,),
+        ).fetchall()
+        self._vectors = [np.frombuffer(row[0], dtype=np.float32) for row in rows]
+        self._keys = [row[1] for row in rows]
+        self._outputs = [row[2] for row in rows]
+        self._matrix = np.vstack(self._vectors) if self._vectors else None
+
+    @property
+    def enabled(self) -> bool:
+        return HAS_EMBEDDINGS
+
+    def _embed(self, text: str):
+        if self._embedder is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            self._embedder = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        vector = np.asarray(self._embedder.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, user_input: str, history=None, threshold: float = 0.92):
+        """Return (cached answer or None, input embedding) for a near-identical input in the same context"""
+        if not self.enabled:
+            return None, None
+        vector = self._embed(user_input)
+        with self._lock:
+            if self._matrix is None:
+                return None, vector
+            scores = self._matrix @ vector
+            scores[np.asarray(self._keys) != history_hash(history)] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                return self._outputs[best], vector
+            return None, vector
+
+    def insert(self, user_input: str, output: str, history=None, vector=None):
+        """Store an answer together with its input embedding"""
+        if not self.enabled or not is_answer(output):
+            return
+        if vector is None:
+            vector = self._embed(user_input)
+        h_hash = history_hash(history)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache (embedding, input, output, sys_hash, history_hash) VALUES (?, ?, ?, ?, ?)",
+                (vector.tobytes(), user_input, output, self.sys_hash, h_hash),
+            )
+            self._conn.commit()
+            self._vectors.append(vector)
+            self._keys.append(h_hash)
+            self._outputs.append(output)
+            self._matrix = np.vstack(self._vectors)
+
+
+class ExactCache:
+    """Thread-safe LRU cache of answers keyed by exact_key, persisted as JSON between runs.
+
+    Entries expire after `ttl` seconds, since answers may depend on the weather and the date.
+    """
+
+    def __init__(self, path: str = os.path.join(CACHE_DIR, "exact.json"), maxsize: int = 512, ttl: int = 600):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+        now = time.time()
+        for key, entry in stored.items():
+            # Entries are [output, stored_at]; older formats and expired answers are dropped
+            if isinstance(entry, list) and len(entry) == 2 and now - entry[1] < ttl:
+                self._entries[key] = entry
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, output: str):
+        if not is_answer(output):
+            return
+        with self._lock:
+            self._entries[key] = [output, time.time()]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Write the cache to disk so warm starts keep it"""
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+        except OSError as e:
+            print(f"Warning: Could not save response cache: {e}")
@@ -4,16 +4,27 @@
 Test script to debug weather tool issues
 """
 import os
+import io
+import sys
+import asyncio
+import threading
+import requests
 from dotenv import load_dotenv
+
+# Read the .env file once, before the tools read their settings; every test uses these constants
+load_dotenv(dotenv_path="./config/.env")
+
 from tools.weather_tool import create_weather_tool
 
+OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
+WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+API_KEY = OPENWEATHERMAP_API_KEY or WEATHER_API_KEY
+
 def test_environment():
     """Test environment variables"""
-    load_dotenv(dotenv_path="./config/.env")
-    
     print("=== Environment Variable Check ===")
-    api_key = os.getenv("OPENWEATHERMAP_API_KEY")
-    weather_key = os.getenv("WEATHER_API_KEY")
+    api_key = OPENWEATHERMAP_API_KEY
+    weather_key = WEATHER_API_KEY
     
     print(f"OPENWEATHERMAP_API_KEY: {'SET' if api_key else 'NOT SET'}")
     print(f"WEATHER_API_KEY: {'SET' if weather_key else 'NOT SET'}")
@@ -56,7 +67,7 @@ def test_langchain_wrapper():
         from langchain_community.utilities import OpenWeatherMapAPIWrapper
         
         # Check if API key is available
-        api_key = os.getenv("OPENWEATHERMAP_API_KEY") or os.getenv("WEATHER_API_KEY")
+        api_key = API_KEY
         if not api_key:
             print("ERROR: No API key available")
             return False
@@ -76,15 +87,17 @@ def test_api_key_validity():
     print("\n=== API Key Validity Test ===")
     
     try:
-        import requests
-        
-        api_key = os.getenv("OPENWEATHERMAP_API_KEY") or os.getenv("WEATHER_API_KEY")
+        api_key = API_KEY
         if not api_key:
             print("ERROR: No API key found")
             return False
         
-        url = f"https://api.openweathermap.org/data/2.5/weather?q=Rome&appid={api_key}&units=metric"
-        response = requests.get(url, timeout=10)
+        # One uncached request: this checks the key itself
+        response = requests.get(
+            "https://api.openweathermap.org/data/2.5/weather",
+            params={"q": "Rome", "appid": api_key, "units": "metric"},
+            timeout=10,
+        )
         
         print(f"API response status: {response.status_code}")
         
@@ -105,30 +118,64 @@ def test_api_key_validity():
         print(f"ERROR: {e}")
         return False
 
+class _PerThreadStdout(io.TextIOBase):
+    """stdout that sends each worker thread's prints to that thread's own buffer"""
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def write(self, text):
+        return getattr(self._local, "buffer", self._fallback).write(text)
+
+    def flush(self):
+        self._fallback.flush()
+
+def _run_captured(stdout, test_name, test_func):
+    """Run one test in the current thread and return (success, captured output)"""
+    stdout._local.buffer = io.StringIO()
+    try:
+        success = test_func()
+    except Exception as e:
+        print(f"EXCEPTION in {test_name}: {e}")
+        success = False
+    return success, stdout._local.buffer.getvalue()
+
+async def _run_concurrently(tests):
+    """Run independent network tests at the same time, so the total wait is the slowest one"""
+    stdout = _PerThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        return await asyncio.gather(
+            *(asyncio.to_thread(_run_captured, stdout, name, func) for name, func in tests)
+        )
+    finally:
+        sys.stdout = stdout._fallback
+
 def main():
     print("Weather Tool Debug Script")
     print("=" * 50)
     
-    # Load environment
-    load_dotenv(dotenv_path="./config/.env")
-    
-    # Run tests
+    results = []
+    print(f"\n{'='*20} Environment Check {'='*20}")
+    try:
+        results.append(("Environment Check", test_environment()))
+    except Exception as e:
+        print(f"EXCEPTION in Environment Check: {e}")
+        results.append(("Environment Check", False))
+
+    # The network tests don't depend on each other, so they run concurrently
     tests = [
-        ("Environment Check", test_environment),
         ("API Key Validity", test_api_key_validity),
         ("LangChain Wrapper", test_langchain_wrapper),
         ("Weather Tool Direct", test_weather_tool_directly),
     ]
-    
-    results = []
-    for test_name, test_func in tests:
+    outcomes = asyncio.run(_run_concurrently(tests))
+
+    for (test_name, _), (success, output) in zip(tests, outcomes):
         print(f"\n{'='*20} {test_name} {'='*20}")
-        try:
-            success = test_func()
-            results.append((test_name, success))
-        except Exception as e:
-            print(f"EXCEPTION in {test_name}: {e}")
-            results.append((test_name, False))
+        print(output, end="")
+        results.append((test_name, success))
     
     # Summary
     print(f"\n{'='*50}")
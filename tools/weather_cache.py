@@ -0,0 +1,10 @@
+import os
+from cachetools import TTLCache
+
+# OpenWeatherMap refreshes current conditions about every 10 minutes; override with TRIPY_WX_TTL (seconds).
+# Read on import, so load config/.env before importing the weather tools.
+WEATHER_CACHE_TTL = int(os.getenv("TRIPY_WX_TTL", "600"))
+
+def make_weather_cache() -> TTLCache:
+    """Per-location report cache that expires with WEATHER_CACHE_TTL"""
+    return TTLCache(maxsize=256, ttl=WEATHER_CACHE_TTL)
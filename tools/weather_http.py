@@ -0,0 +1,26 @@
+import asyncio
+import atexit
+import httpx
+from http_clients import make_async_client
+
+_async_client = None
+_client_loop = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """One client for every async weather lookup, so a burst of cities shares one TLS connection"""
+    # Created lazily inside the running loop; the agent runs all tool calls on one loop
+    global _async_client, _client_loop
+    if _async_client is None:
+        _async_client = make_async_client(timeout=10.0)
+        _client_loop = asyncio.get_running_loop()
+    return _async_client
+
+def _close_async_client():
+    # The client's connections belong to the loop that created it, so close it there
+    if _async_client is not None and _client_loop is not None and _client_loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_async_client.aclose(), _client_loop).result(timeout=5)
+        except Exception:
+            pass
+
+atexit.register(_close_async_client)
@@ -0,0 +1,7 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+# Shared by both weather tools so pydantic builds the schema once
+class WeatherInput(BaseModel):
+    city: str = Field(description="City name to get the weather for")
+    country_code: Optional[str] = Field(default=None, description="2-letter country code (optional)")
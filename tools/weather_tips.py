@@ -0,0 +1,14 @@
+import math
+from bisect import bisect_right
+
+# Cold below 10°C, hot above 25°C (25 itself still counts as comfortable)
+_THRESHOLDS = (10, math.nextafter(25, math.inf))
+_TIPS = (
+    "Pack warm clothes - great for indoor activities like museums!",
+    "Comfortable weather - pack layers for versatility!",
+    "Pack light clothes, sunscreen, and stay hydrated!",
+)
+
+def travel_tip(temp: float) -> str:
+    """Packing tip for a temperature in °C"""
+    return _TIPS[bisect_right(_THRESHOLDS, temp)]
@@ -1,12 +1,92 @@
 import os
-from typing import Optional, Type
+import re
+import asyncio
+import logging
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Lock
+from typing import List, Optional, Type
 from langchain.tools import BaseTool
 from langchain_community.utilities import OpenWeatherMapAPIWrapper
 from pydantic import BaseModel, Field
-
-class WeatherInput(BaseModel):
-    city: str = Field(description="City name to get the weather for")
-    country_code: Optional[str] = Field(default=None, description="2-letter country code (optional)")
+from http_clients import make_client
+from tools.weather_cache import make_weather_cache
+from tools.weather_http import get_async_client
+from tools.weather_models import WeatherInput
+from tools.weather_tips import travel_tip
+
+logger = logging.getLogger(__name__)
+
+# One wrapper (and its client) per API key instead of one per lookup
+@lru_cache(maxsize=4)
+def _get_wrapper(api_key: str) -> OpenWeatherMapAPIWrapper:
+    return OpenWeatherMapAPIWrapper(openweathermap_api_key=api_key)
+
+# Repeated questions about a city reuse the last answer until it expires (shared by the sync and async paths)
+_WX_CACHE = make_weather_cache()
+_WX_LOCK = Lock()
+
+OWM_WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+# First temperature in the report ("Current: 21.4°C")
+_TEMP_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*°C")
+
+def _cached(query: str):
+    with _WX_LOCK:
+        return _WX_CACHE.get(query)
+
+def _store(query: str, result: str) -> str:
+    with _WX_LOCK:
+        _WX_CACHE[query] = result
+    return result
+
+def _fetch_weather(query: str, api_key: str) -> str:
+    key = query.strip().lower()
+    cached = _cached(key)
+    if cached is not None:
+        return cached
+    return _store(key, _get_wrapper(api_key).run(query.strip()))
+
+def _format_current(location: str, data: dict) -> str:
+    """Same layout as OpenWeatherMapAPIWrapper.run, built from the REST response"""
+    main = data["main"]
+    wind = data.get("wind", {})
+    return (
+        f"In {location}, the current weather is as follows:\n"
+        f"Detailed status: {data['weather'][0]['description']}\n"
+        f"Wind speed: {wind.get('speed')} m/s, direction: {wind.get('deg')}°\n"
+        f"Humidity: {main['humidity']}%\n"
+        f"Temperature: \n"
+        f"  - Current: {main['temp']}°C\n"
+        f"  - High: {main['temp_max']}°C\n"
+        f"  - Low: {main['temp_min']}°C\n"
+        f"  - Feels like: {main['feels_like']}°C\n"
+        f"Rain: {data.get('rain', {})}\n"
+        f"Heat index: None\n"
+        f"Cloud cover: {data.get('clouds', {}).get('all')}%"
+    )
+
+async def _afetch_weather(query: str, api_key: str) -> str:
+    key = query.strip().lower()
+    cached = _cached(key)
+    if cached is not None:
+        return cached
+    response = await get_async_client().get(
+        OWM_WEATHER_URL, params={"q": query.strip(), "appid": api_key, "units": "metric"}
+    )
+    response.raise_for_status()
+    return _store(key, _format_current(query.strip(), response.json()))
+
+def _add_travel_tips(result: str) -> str:
+    # Add travel tips based on the result
+    parts = [result, "", "Travel Tips based on current conditions:"]
+    
+    # Simple temperature-based recommendations
+    m = _TEMP_RE.search(result)
+    temp = float(m.group(1)) if m else None
+    parts.append(travel_tip(temp) if temp is not None else "Check the weather and pack accordingly!")
+    
+    return "\n".join(parts) + "\n"
 
 class WeatherTool(BaseTool):
     name: str = "get_weather"
@@ -21,175 +101,100 @@ class WeatherTool(BaseTool):
             if not api_key:
                 return "Weather service unavailable - OPENWEATHERMAP_API_KEY not set in environment variables."
             
-            # Initialize the wrapper with explicit API key
-            weather = OpenWeatherMapAPIWrapper(openweathermap_api_key=api_key)
-            
             # Build query
             query = f"{city},{country_code}" if country_code else city
             
-            print(f"Fetching weather for: {query}")  # Debug
-            
-            # Get weather data
-            result = weather.run(query)
-            
-            # Add travel tips based on the result
-            enhanced_result = result + "\n\nTravel Tips based on current conditions:\n"
+            logger.debug("Fetching weather for: %s", query)
             
-            # Simple temperature-based recommendations
-            if "°C" in result:
-                # Extract temperature (this is a simple approach)
-                temp_match = result.split("°C")[0].split()[-1]
-                try:
-                    temp = float(temp_match)
-                    if temp < 10:
-                        enhanced_result += "Pack warm clothes - great for indoor activities like museums!\n"
-                    elif temp > 25:
-                        enhanced_result += "Pack light clothes, sunscreen, and stay hydrated!\n"
-                    else:
-                        enhanced_result += "Comfortable weather - pack layers for versatility!\n"
-                except:
-                    enhanced_result += "Check the weather and pack accordingly!\n"
-            
-            return enhanced_result
+            # Get weather data (cached per query)
+            return _add_travel_tips(_fetch_weather(query, api_key))
             
         except Exception as e:
             return f"Failed to fetch weather: {str(e)}. Please check your API key and city name."
 
     async def _arun(self, city: str, country_code: Optional[str] = None) -> str:
-        return self._run(city, country_code)
+        # Non-blocking request on the agent's event loop, so parallel tool calls overlap
+        api_key = os.getenv("OPENWEATHERMAP_API_KEY")
+        if not api_key:
+            return "Weather service unavailable - OPENWEATHERMAP_API_KEY not set in environment variables."
+        query = f"{city},{country_code}" if country_code else city
+        try:
+            return _add_travel_tips(await _afetch_weather(query, api_key))
+        except httpx.TransportError:
+            # Network trouble on the async client: try the synchronous wrapper in a worker thread
+            return await asyncio.to_thread(self._run, city, country_code)
+        except Exception as e:
+            # HTTP errors (bad key, unknown city) would only fail again through the wrapper
+            return f"Failed to fetch weather: {str(e)}. Please check your API key and city name."
 
 def create_weather_tool():
     """Create and return the weather tool"""
     return WeatherTool()
 
-
-
-
-
-
-
-
-
-
-# import requests
-# import os
-# from typing import Optional, Type
-# from langchain.tools import BaseTool
-# from pydantic import BaseModel, Field
-# from langchain.utilities import OpenWeatherMapAPIWrapper
-
-
-# class WeatherInput(BaseModel):
-#     city: str = Field(description="City name to get the weather for")
-#     country_code: Optional[str] = Field(default=None, description="2-letter country code (optional)")
-
-# class WeatherTool(BaseTool):
-#     name: str = "get_weather"
-#     description: str = """Get current weather and 5-day forecast for a specified city.
-#     Useful for travel planning to recommend appropriate activities and clothing.
-#     Input should be a city name, optionally with a country code."""
-#     args_schema: Type[BaseModel] = WeatherInput
-
-#     def _run(self, city: str, country_code: Optional[str] = None) -> str:
-#         """Execute the weather lookup"""
-#         try:
-#             api_key = os.getenv("WEATHER_API_KEY")
-#             if not api_key:
-#                 return "Weather service unavailable - API key not configured."
-
-#             query = city
-#             if country_code:
-#                 query = f"{city},{country_code}"
-
-#             current_url = f"http://api.openweathermap.org/data/2.5/weather"
-#             print(current_data)
-#             current_params = {
-#                 "q": query,
-#                 "appid": api_key,
-#                 "units": "metric"
-#             }
-
-#             current_response = requests.get(current_url, params=current_params)
-
-#             if current_response.status_code != 200:
-#                 return f"Could not get weather for {city}. Please check the city name again."
-
-#             current_data = current_response.json()
-#             forecast_url = f"http://api.openweathermap.org/data/2.5/forecast"
-#             forecast_params = {
-#                 "q": query,
-#                 "appid": api_key,
-#                 "units": "metric"
-#             }
-
-#             forecast_response = requests.get(forecast_url, params=forecast_params)
-
-
-#             result = self._format_weather_info(current_data, forecast_response.json() if forecast_response.status_code == 200 else None)
-#             return result
-
-#         except Exception as e:
-#             return f"An error occurred while fetching weather data: {str(e)}"
-        
-#     async def _arun(self, city: str, country_code: Optional[dict] = None) -> str:
-#         """Async version, just call the sync version for now"""
-#         return self._run(city, country_code)
-
-#     def _format_weather_info(self, current_data, forecast_data: Optional[dict] = None) -> str:
-#         """Format weather data into a readable string"""
-    
-#         cityname = current_data['name']
-#         country = current_data['sys']['country']
-#         temperature = round(current_data['main']['temp'])
-#         feels_like = round(current_data['main']['feels_like'])
-#         description = current_data['weather'][0]['description'].title()
-#         humidity = current_data['main']['humidity']
-    
-    
-#         result = f"Current weather in {cityname}, {country}:\n\n"
-#         result += f"Temperature: {temperature}°C (Feels like: {feels_like}°C)\n"
-#         result += f"Condition: {description}\n"
-#         result += f"Humidity: {humidity}%\n"
-    
-#         if forecast_data:
-#             result += "\n5-day Forecast:\n"
-    
-#             day_forecasts = {}
-#             for item in forecast_data['list'][:15]:
-#                 date = item['dt_txt'].split(' ')[0]
-#                 if date not in day_forecasts:
-#                     day_forecasts[date] = {
-#                         'temp_min': item['main']['temp'],
-#                         'temp_max': item['main']['temp'],
-#                         'description': item['weather'][0]['description'],
-#                     }
-#                 else:
-#                     day_forecasts[date]['temp_min'] = min(day_forecasts[date]['temp_min'], item['main']['temp'])
-#                     day_forecasts[date]['temp_max'] = max(day_forecasts[date]['temp_max'], item['main']['temp'])
-            
-#             for date, data in list(day_forecasts.items())[:5]:
-#                 temp_min = round(data['temp_min'])
-#                 temp_max = round(data['temp_max'])
-#                 description = data['description'].title()
-#                 result += f"{date}: {temp_min}°C - {temp_max}°C, {description}\n"
-        
-#         result += "\nTravel Tips:\n"
-#         if temperature < 10:
-#             result += " * Pack warm clothing and consider indoor activities.\n"
-#             result += " * Great for indoor activities, museums, or cozy cafes.\n"
-#         elif temperature > 25:
-#             result += " * Pack light and breathable clothing.\n"
-#             result += " * Perfect for outdoor activities like hiking or sightseeing.\n"
-#             result += " * Stay hydrated and use sunscreen.\n"
-#         else:
-#             result += " * Comfortable weather for most activities.\n"
-#             result += " * Pack layers for changing temperatures.\n"
-    
-#         if humidity > 70:
-#             result += " * High humidity - dress for confort.\n"
-        
-#         return result
-
-# def create_weather_tool():
-#     """Create and return the weather tool"""
-#     return WeatherTool()
\ No newline at end of file
+# Several cities in one request: Open-Meteo accepts comma-separated coordinates and returns one entry per location
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+_HTTP_CLIENT = make_client(timeout=10.0)
+# Uncached cities are geocoded side by side before the single forecast request
+_GEOCODE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="geocode")
+
+class WeatherBatchInput(BaseModel):
+    cities: List[str] = Field(description="City names to get the current weather for")
+
+@lru_cache(maxsize=256)
+def _geocode(city: str):
+    """Return (label, latitude, longitude) for a city, or None if Open-Meteo does not know it"""
+    response = _HTTP_CLIENT.get(GEOCODING_URL, params={"name": city, "count": 1})
+    response.raise_for_status()
+    results = response.json().get("results")
+    if not results:
+        return None
+    place = results[0]
+    return f"{place['name']}, {place.get('country_code', '')}".rstrip(", "), place["latitude"], place["longitude"]
+
+def _fetch_weather_batch(cities: List[str]) -> List[str]:
+    places = list(_GEOCODE_POOL.map(_geocode, [city.strip().lower() for city in cities]))
+    found = [place for place in places if place is not None]
+    current = {}
+    if found:
+        response = _HTTP_CLIENT.get(OPEN_METEO_URL, params={
+            "latitude": ",".join(str(lat) for _, lat, _ in found),
+            "longitude": ",".join(str(lon) for _, _, lon in found),
+            "current": "temperature_2m,relative_humidity_2m",
+        })
+        response.raise_for_status()
+        data = response.json()
+        # A single location comes back as an object rather than a list
+        entries = data if isinstance(data, list) else [data]
+        current = {place: entry["current"] for place, entry in zip(found, entries)}
+
+    lines = []
+    for city, place in zip(cities, places):
+        if place is None:
+            lines.append(f"{city}: no weather data found")
+        else:
+            now = current[place]
+            lines.append(f"{place[0]}: {now['temperature_2m']}°C, humidity {now['relative_humidity_2m']}%")
+    return lines
+
+class WeatherBatchTool(BaseTool):
+    name: str = "get_weather_batch"
+    description: str = """Get current weather for several cities at once (e.g. every stop of an itinerary).
+    Input should be a list of city names."""
+    args_schema: Type[BaseModel] = WeatherBatchInput
+
+    def _run(self, cities: List[str]) -> str:
+        try:
+            return "\n".join(_fetch_weather_batch(cities))
+        except httpx.HTTPError:
+            # Open-Meteo unavailable: fall back to one OpenWeatherMap lookup per city
+            single = WeatherTool()
+            return "\n\n".join(single._run(city) for city in cities)
+
+    async def _arun(self, cities: List[str]) -> str:
+        # The lookups block on their own pool and client, so keep them off the event loop
+        return await asyncio.to_thread(self._run, cities)
+
+def create_weather_batch_tool():
+    """Create and return the multi-city weather tool"""
+    return WeatherBatchTool()
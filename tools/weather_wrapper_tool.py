@@ -1,15 +1,66 @@
 import os
+import asyncio
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import groupby
+from threading import Lock
 from typing import Optional, Type
 from langchain.tools import BaseTool
 from langchain_community.utilities import OpenWeatherMapAPIWrapper
-from pydantic import BaseModel, Field
-
-class WeatherInput(BaseModel):
-    city: str = Field(description="City name to get the weather for")
-    country_code: Optional[str] = Field(default=None, description="2-letter country code (optional)")
+from pydantic import BaseModel
+from tools.weather_cache import WEATHER_CACHE_TTL, make_weather_cache
+from tools.weather_http import get_async_client
+from tools.weather_models import WeatherInput
+from tools.weather_tips import travel_tip
+
+# requests-cache is optional; without it lookups are only cached in memory
+try:
+    from requests_cache import CachedSession
+except ImportError:
+    CachedSession = None
+
+# Formatted reports per location
+_WX_CACHE = make_weather_cache()
+_WX_LOCK = Lock()
+
+# Current conditions and forecast are independent requests, so they are fetched side by side
+_FETCH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather")
+OWM_BASE_URL = "https://api.openweathermap.org/data/2.5"
+HTTP_CACHE_PATH = "./cache/owm"
+
+def _make_http_session() -> requests.Session:
+    """Keep-alive session; with requests-cache, successful responses also survive restarts"""
+    if CachedSession is None:
+        return requests.Session()
+    os.makedirs(os.path.dirname(HTTP_CACHE_PATH), exist_ok=True)
+    return CachedSession(
+        cache_name=HTTP_CACHE_PATH,
+        backend="sqlite",
+        expire_after=WEATHER_CACHE_TTL,
+        allowable_methods=("GET",),
+        # Keeps the API key out of the stored URLs and out of the cache key
+        ignored_parameters=["appid"],
+        cache_control=True,
+    )
+
+# Keep-alive connections shared by every lookup
+_HTTP = _make_http_session()
 
 # Step 1: Create a subclass to extend OpenWeatherMapAPIWrapper
 class CustomWeatherWrapper(OpenWeatherMapAPIWrapper):
+    def _call_api(self, endpoint: str, params: dict):
+        api_key = self.openweathermap_api_key or os.getenv("OPENWEATHERMAP_API_KEY")
+        response = _HTTP.get(f"{OWM_BASE_URL}/{endpoint}", params={**params, "appid": api_key}, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    async def _acall_api(self, endpoint: str, params: dict):
+        api_key = self.openweathermap_api_key or os.getenv("OPENWEATHERMAP_API_KEY")
+        response = await get_async_client().get(f"{OWM_BASE_URL}/{endpoint}", params={**params, "appid": api_key})
+        response.raise_for_status()
+        return response.json()
+
     def get_current_weather_data(self, location: str):
         return self._call_api("weather", {"q": location, "units": "metric"})
 
@@ -24,51 +75,85 @@ class CustomWeatherWrapper(OpenWeatherMapAPIWrapper):
         description = current_data['weather'][0]['description'].title()
         humidity = current_data['main']['humidity']
 
-        result = f"Current weather in {cityname}, {country}:\n\n"
-        result += f"Temperature: {temperature}°C (Feels like: {feels_like}°C)\n"
-        result += f"Condition: {description}\n"
-        result += f"Humidity: {humidity}%\n"
+        parts = [
+            f"Current weather in {cityname}, {country}:",
+            "",
+            f"Temperature: {temperature}°C (Feels like: {feels_like}°C)",
+            f"Condition: {description}",
+            f"Humidity: {humidity}%",
+        ]
 
         if forecast_data:
-            result += "\n5-day Forecast:\n"
+            parts += ["", "5-day Forecast:"]
+            # Entries are chronological, so each day is one contiguous run ("YYYY-MM-DD HH:MM:SS")
             day_forecasts = {}
-            for item in forecast_data['list']:
-                date = item['dt_txt'].split(' ')[0]
-                if date not in day_forecasts:
-                    day_forecasts[date] = {
-                        'temp_min': item['main']['temp_min'],
-                        'temp_max': item['main']['temp_max'],
-                        'description': item['weather'][0]['description'],
-                    }
-                else:
-                    day_forecasts[date]['temp_min'] = min(day_forecasts[date]['temp_min'], item['main']['temp_min'])
-                    day_forecasts[date]['temp_max'] = max(day_forecasts[date]['temp_max'], item['main']['temp_max'])
+            for date, group in groupby(forecast_data['list'], key=lambda item: item['dt_txt'][:10]):
+                group = list(group)
+                day_forecasts[date] = {
+                    'temp_min': min(item['main']['temp_min'] for item in group),
+                    'temp_max': max(item['main']['temp_max'] for item in group),
+                    'description': group[0]['weather'][0]['description'],
+                }
 
             # Limit to next 5 days
             for date, data in list(day_forecasts.items())[:5]:
                 temp_min = round(data['temp_min'])
                 temp_max = round(data['temp_max'])
                 description = data['description'].title()
-                result += f"{date}: {temp_min}°C - {temp_max}°C, {description}\n"
+                parts.append(f"{date}: {temp_min}°C - {temp_max}°C, {description}")
 
         # Example travel tips based on temperature & humidity
-        if temperature < 10:
-            result += "\nTravel Tips:\n * Pack warm clothes and enjoy indoor activities.\n"
-        elif temperature > 25:
-            result += "\nTravel Tips:\n * Pack light clothes, stay hydrated, and use sunscreen.\n"
-        else:
-            result += "\nTravel Tips:\n * Comfortable weather, pack layers for changes.\n"
+        parts += ["", "Travel Tips:"]
+        parts.append(f" * {travel_tip(temperature)}")
 
         if humidity > 70:
-            result += " * High humidity, dress comfortably.\n"
+            parts.append(" * High humidity, dress comfortably.")
 
-        return result
+        return "\n".join(parts) + "\n"
 
     # Override run() to fetch and format both current + forecast data
     def run(self, location: str) -> str:
-        current = self.get_current_weather_data(location)
-        forecast = self.get_forecast_data(location)
-        return self.format_weather(current, forecast)
+        key = location.strip().lower()
+        with _WX_LOCK:
+            cached = _WX_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            current_future = _FETCH_POOL.submit(self.get_current_weather_data, location)
+            forecast_future = _FETCH_POOL.submit(self.get_forecast_data, location)
+        except RuntimeError:
+            # The pool is shut down (interpreter exit): fall back to one request after the other
+            current = self.get_current_weather_data(location)
+            forecast = self.get_forecast_data(location)
+        else:
+            # HTTP errors and timeouts propagate; retrying would only repeat the same requests
+            current, forecast = current_future.result(timeout=10), forecast_future.result(timeout=10)
+        result = self.format_weather(current, forecast)
+        with _WX_LOCK:
+            _WX_CACHE[key] = result
+        return result
+
+    async def arun(self, location: str) -> str:
+        key = location.strip().lower()
+        with _WX_LOCK:
+            cached = _WX_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        params = {"q": location, "units": "metric"}
+        current, forecast = await asyncio.gather(
+            self._acall_api("weather", params), self._acall_api("forecast", params)
+        )
+        result = self.format_weather(current, forecast)
+        with _WX_LOCK:
+            _WX_CACHE[key] = result
+        return result
+
+
+@lru_cache(maxsize=1)
+def _get_wrapper() -> CustomWeatherWrapper:
+    return CustomWeatherWrapper()
 
 
 # Step 2: Use the custom wrapper in your tool
@@ -79,14 +164,20 @@ class WeatherTool(BaseTool):
 
     def _run(self, city: str, country_code: Optional[str] = None) -> str:
         try:
-            wrapper = CustomWeatherWrapper()
+            wrapper = _get_wrapper()
             query = f"{city},{country_code}" if country_code else city
             return wrapper.run(query)
         except Exception as e:
             return f"Failed to fetch weather: {str(e)}"
 
     async def _arun(self, city: str, country_code: Optional[str] = None) -> str:
-        return self._run(city, country_code)
+        # Non-blocking requests on the agent's event loop, so parallel tool calls overlap
+        query = f"{city},{country_code}" if country_code else city
+        try:
+            return await _get_wrapper().arun(query)
+        except Exception:
+            # Fall back to the synchronous lookup in a worker thread
+            return await asyncio.to_thread(self._run, city, country_code)
 
 
 def create_weather_tool():